@@ -9,11 +9,29 @@ config = {
     "theta_2_dot": 1,
     "t_span": (0, 30),
     "steps": 2000,
+    "output_stride": 1, # rk4: record every k-th step
     "animate": True,
     "interval": 40,
     "plot": True,
     "multi_pendulum": True,
     "num_of_pendulums": 4,
     "energy_plot": True,
-    "method": "solve_ivp" #solve_ivp or rk4
+    "downsample": "minmax", # minmax, lttb or None
+    "divergence_tracking": False,
+    "divergence_threshold": 0.1,
+    "divergence_mode": "reference", # reference or pairwise
+    "stop_diverged": True,
+    "monte_carlo": False,
+    "uncertainty": { # key: (distribution, scale); normal, uniform or lognormal
+        "theta_1": ("normal", 1.0),
+        "theta_2": ("normal", 1.0),
+    },
+    "mc_samples": 100000,
+    "mc_batch_size": 5000,
+    "mc_output_points": 200,
+    "mc_bins": 100,
+    "method": "solve_ivp", #solve_ivp or rk4
+    "ivp_method": "DOP853",
+    "rtol": 1e-10,
+    "atol": 1e-10
 }
@@ -0,0 +1,37 @@
+import numpy as np
+from config import config
+from utils.monte_carlo import MonteCarloEnsemble
+
+
+class NarrowEnsemble(MonteCarloEnsemble):
+    def energy_edges(self):
+        edges = super().energy_edges()
+        return np.linspace(edges[self.bins * 2 // 5], edges[self.bins * 3 // 5], self.bins + 1)
+
+
+def make_config(**overrides):
+    cfg = dict(config, t_span=(0, 1), steps=100, mc_samples=4000, mc_batch_size=1000,
+               mc_output_points=10, mc_seed=0, uncertainty={"theta_1": ("normal", 10.0)})
+    cfg.update(overrides)
+    return cfg
+
+
+def test_angle_statistics_are_circular_across_the_wrap():
+    # samples straddle ±π, where a linear mean of wrapped angles would be ~0
+    mc = MonteCarloEnsemble(make_config(theta_1=180, theta_1_dot=0, theta_2_dot=0))
+    assert abs(abs(mc.mean_of("theta_1")[0]) - np.pi) < 0.01
+    assert abs(mc.std("theta_1")[0] - np.radians(10)) < 0.01
+
+
+def test_energies_outside_the_histogram_are_counted():
+    mc = MonteCarloEnsemble(make_config())
+    assert mc.outside("energy").sum() == 0
+    assert not np.isnan(mc.quantile("energy", 0.05)).any()
+
+    mc = NarrowEnsemble(make_config())
+    assert mc.outside("energy").min() > 0
+    np.testing.assert_array_equal(mc.histograms[2].sum(axis=1) + mc.outside("energy"), mc.count)
+    assert np.isnan(mc.quantile("energy", 0.01)).all()
+    assert np.isnan(mc.quantile("energy", 0.99)).all()
+    inside = (mc.underflow[2, -1] + mc.count - mc.overflow[2, -1]) / (2 * mc.count)
+    assert not np.isnan(mc.quantile("energy", inside)[-1])
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+from config import config
+from utils.pendulum import Pendulum, accelerations
+
+
+def make_config(**overrides):
+    cfg = dict(config, method="rk4", t_span=(0, 5), steps=500, output_stride=1)
+    cfg.update(overrides)
+    return cfg
+
+
+def reference_rk4(cfg):
+    def f(y):
+        return np.array([y[2], y[3], *accelerations(*y, cfg["mass_1"], cfg["mass_2"],
+                                                     cfg["length_1"], cfg["length_2"])])
+
+    t0, tf = cfg["t_span"]
+    h = (tf - t0) / cfg["steps"]
+    y = np.radians([cfg["theta_1"], cfg["theta_2"], cfg["theta_1_dot"], cfg["theta_2_dot"]])
+    states = [y]
+    for _ in range(cfg["steps"]):
+        k1 = f(y)
+        k2 = f(y + h * k1 / 2)
+        k3 = f(y + h * k2 / 2)
+        k4 = f(y + h * k3)
+        y = y + h * ((k1 + 2 * k2 + 2 * k3 + k4) / 6)
+        states.append(y)
+    return np.array(states).T
+
+
+def test_stride_one_matches_plain_rk4():
+    cfg = make_config()
+    p = Pendulum(cfg)
+    assert p.solution_t.shape == (cfg["steps"] + 1,)
+    np.testing.assert_array_equal(p.solution_y, reference_rk4(cfg))
+
+
+def test_stride_keeps_every_kth_and_the_final_state():
+    full = Pendulum(make_config())
+    strided = Pendulum(make_config(output_stride=7))
+    np.testing.assert_array_equal(strided.solution_t[:-1], full.solution_t[::7])
+    np.testing.assert_array_equal(strided.solution_y[:, :-1], full.solution_y[:, ::7])
+    np.testing.assert_array_equal(strided.solution_y[:, -1], full.solution_y[:, -1])
+
+
+def test_output_times_on_the_grid_match_grid_states():
+    full = Pendulum(make_config())
+    picked = [0, 3, 250, 499, 500]
+    p = Pendulum(make_config(output_times=full.solution_t[picked][::-1]))
+    np.testing.assert_allclose(p.solution_t, full.solution_t[picked])
+    np.testing.assert_allclose(p.solution_y, full.solution_y[:, picked], rtol=0, atol=1e-12)
+
+
+def test_output_times_between_steps_are_interpolated():
+    fine = Pendulum(make_config(steps=4000))
+    picked = [10, 987, 3999]
+    # these fall strictly inside coarse steps but on the fine grid; the
+    # interpolant is fourth order, so it adds nothing to the RK4 error itself
+    p = Pendulum(make_config(output_times=fine.solution_t[picked]))
+    coarse = Pendulum(make_config())
+    tolerance = np.abs(coarse.solution_y[:, -1] - fine.solution_y[:, -1]).max()
+    np.testing.assert_allclose(p.solution_y, fine.solution_y[:, picked], rtol=0, atol=2 * tolerance)
+
+
+def test_observers_see_every_step():
+    seen = []
+    p = Pendulum(make_config(), observers=[lambda t, y: seen.append((t, y.copy()))])
+    assert len(seen) == p.steps + 1
+    np.testing.assert_allclose([t for t, _ in seen], p.solution_t)
+    np.testing.assert_array_equal(np.array([y for _, y in seen]).T, p.solution_y)
+
+
+@pytest.mark.parametrize("overrides", [
+    {"output_times": []},
+    {"output_times": [6.0]},
+    {"output_times": [1.0], "output_stride": 2},
+    {"method": "solve_ivp", "output_stride": 2},
+])
+def test_invalid_output_settings_are_rejected(overrides):
+    with pytest.raises(ValueError):
+        Pendulum(make_config(**overrides))
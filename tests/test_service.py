@@ -0,0 +1,148 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import Future
+import numpy as np
+import pytest
+from config import config
+from utils.service import (ServiceBusy, SimulationServer, SimulationService,
+                           make_handler, validate)
+
+
+BASE = dict(config, method="rk4", t_span=(0, 5), steps=300, output_stride=1)
+
+
+@pytest.fixture
+def service():
+    service = SimulationService(window=0.2)
+    yield service
+    service.shutdown()
+
+
+@pytest.fixture
+def post():
+    servers = []
+
+    def post(service, body):
+        if not servers:
+            server = SimulationServer(("127.0.0.1", 0), make_handler(service, BASE))
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            servers.append(server)
+        host, port = servers[0].server_address
+        request = urllib.request.Request(f"http://{host}:{port}/simulate",
+                                         data=json.dumps(body).encode(), method="POST")
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status, json.loads(response.read())
+        except urllib.error.HTTPError as exc:
+            return exc.code, json.loads(exc.read())
+
+    yield post
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def single(cfg):
+    service = SimulationService(window=0)
+    try:
+        return service.simulate(cfg)
+    finally:
+        service.shutdown()
+
+
+def test_batched_results_equal_single_runs(service):
+    configs = [dict(BASE, theta_1=150 + 7 * i, theta_2=-120) for i in range(6)]
+    futures = [service.submit(cfg) for cfg in configs]
+    results = [f.result() for f in futures]
+    assert service.stats["batches"] == 1
+
+    for cfg, (t, y) in zip(configs, results):
+        t_single, y_single = single(cfg)
+        np.testing.assert_array_equal(t, t_single)
+        np.testing.assert_array_equal(y, y_single)
+
+
+def test_identical_requests_share_one_integration(service):
+    first = service.submit(dict(BASE, theta_1=33))
+    # keys that do not change the trajectory are ignored
+    second = service.submit(dict(BASE, theta_1=33, plot=False))
+    assert first is second
+    t, y = first.result()
+
+    cached = service.submit(dict(BASE, theta_1=33))
+    assert cached.result()[1] is y
+    assert service.stats["integrated"] == 1
+    assert service.stats["cache_hits"] == 1
+
+
+def test_batches_are_split_to_bound_their_output(service):
+    service.max_batch_points = 2 * 301
+    futures = [service.submit(dict(BASE, theta_1=10 + i)) for i in range(5)]
+    [f.result() for f in futures]
+    assert service.stats["batches"] == 3
+
+
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+def test_failed_batch_is_retried_one_member_at_a_time(service):
+    good = validate(BASE)
+    # bypasses validation, so this member divides by zero
+    bad = dict(good, length_1=0.0)
+    items = [("good", good), ("bad", bad)]
+    for key, _ in items:
+        service.in_flight[key] = Future()
+    good_future, bad_future = service.in_flight["good"], service.in_flight["bad"]
+
+    service.integrate_batch(items)
+    np.testing.assert_array_equal(good_future.result()[1], single(good)[1])
+    assert isinstance(bad_future.exception(), ValueError)
+    assert service.stats["failed"] == 1
+
+
+@pytest.mark.parametrize("body", [
+    {"mass_1": 0},
+    {"length_2": -1},
+    {"theta_1": float("nan")},
+    {"steps": 10**10},
+    {"steps": 1e400},
+    {"output_stride": 0},
+    {"output_times": []},
+    {"output_times": [6.0]},
+    {"method": "solve_ivp", "output_times": []},
+    {"method": "solve_ivp", "output_stride": 2},
+    {"theta_1": "abc"},
+])
+def test_invalid_requests_get_400(service, post, body):
+    status, payload = post(service, body)
+    assert status == 400
+    assert "invalid request" in payload["error"]
+
+
+def test_valid_request_gets_200(service, post):
+    status, payload = post(service, {"method": "solve_ivp", "output_times": [4, 1]})
+    assert status == 200
+    assert payload["t"] == [1.0, 4.0]
+    assert np.array(payload["y"]).shape == (4, 2)
+
+
+def test_time_limit_gives_504(post):
+    service = SimulationService(window=0, time_limit=-1)
+    try:
+        assert post(service, {})[0] == 504
+        assert post(service, {"method": "solve_ivp"})[0] == 504
+    finally:
+        service.shutdown()
+
+
+def test_full_queue_gives_503(post):
+    service = SimulationService(window=1.0, max_pending=1)
+    try:
+        pending = service.submit(dict(BASE, theta_1=1))
+        with pytest.raises(ServiceBusy):
+            service.submit(dict(BASE, theta_1=2))
+        status, _ = post(service, {"theta_1": 3})
+        assert status == 503
+        pending.result()
+    finally:
+        service.shutdown()
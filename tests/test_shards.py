@@ -0,0 +1,88 @@
+import multiprocessing
+import os
+import time
+import numpy as np
+from config import config
+from utils.shards import (ShardManifest, ShardWorker, ensemble_overrides,
+                          run_local_workers, simulate_job)
+
+
+def make_manifest(directory, steps=200, num_of_pendulums=6, shard_size=2):
+    cfg = dict(config, method="rk4", steps=steps, t_span=(0, 5),
+               num_of_pendulums=num_of_pendulums)
+    return ShardManifest.create(str(directory), cfg, ensemble_overrides(cfg), shard_size)
+
+
+def make_stale(path, age=100):
+    if not os.path.exists(path):
+        open(path, "w").close()
+    old = time.time() - age
+    os.utime(path, (old, old))
+
+
+def test_only_one_worker_reclaims_a_stale_lock(tmp_path):
+    m = make_manifest(tmp_path)
+    shard_id = m.shards[0]["id"]
+    make_stale(m.lock_path(shard_id))
+
+    token = m.claim(shard_id, lease=10)
+    assert token is not None
+    # a second worker that saw the old mtime before the takeover must not
+    # be able to move the fresh lock away
+    assert m.reclaim(shard_id, lease=10) is False
+    assert m.lock_token(shard_id) == token
+    assert m.claim(shard_id, lease=10) is None
+
+
+def test_heartbeat_and_release_require_the_owner_token(tmp_path):
+    m = make_manifest(tmp_path)
+    shard_id = m.shards[0]["id"]
+    token = m.claim(shard_id, lease=10)
+
+    assert m.touch(shard_id, "someone-else") is False
+    m.release(shard_id, "someone-else")
+    assert m.lock_token(shard_id) == token
+
+    assert m.touch(shard_id, token) is True
+    m.release(shard_id, token)
+    assert not os.path.exists(m.lock_path(shard_id))
+
+
+def test_reclaimed_lock_is_not_released_by_its_old_owner(tmp_path):
+    m = make_manifest(tmp_path)
+    shard_id = m.shards[0]["id"]
+    old_token = m.claim(shard_id, lease=10)
+    make_stale(m.lock_path(shard_id))
+
+    new_token = m.claim(shard_id, lease=10)
+    assert new_token not in (None, old_token)
+    assert m.touch(shard_id, old_token) is False
+    m.release(shard_id, old_token)
+    assert m.lock_token(shard_id) == new_token
+
+
+def run_worker(directory, lease):
+    ShardWorker(directory, lease, poll=0.05).run()
+
+
+def test_shards_of_a_killed_worker_are_redistributed(tmp_path):
+    m = make_manifest(tmp_path, steps=20000, num_of_pendulums=6)
+    victim = multiprocessing.Process(target=run_worker, args=(str(tmp_path), 1.0))
+    victim.start()
+
+    locks = os.path.join(str(tmp_path), "locks")
+    deadline = time.time() + 30
+    while not any(name.endswith(".lock") for name in os.listdir(locks)):
+        assert time.time() < deadline
+        time.sleep(0.01)
+    victim.kill()
+    victim.join()
+    assert m.pending()
+
+    result = run_local_workers(str(tmp_path), 2, lease=1.0, poll=0.05)
+
+    assert result["y"].shape[0] == 6
+    assert not m.pending()
+    assert not [name for name in os.listdir(locks) if name.endswith(".lock")]
+    t, y = simulate_job(m.job_config(m.shards[0]["jobs"][0]))
+    np.testing.assert_array_equal(result["y"][0], y)
@@ -0,0 +1,76 @@
+import time
+import numpy as np
+from utils.pendulum import accelerations
+
+
+PARAMETER_KEYS = ("mass_1", "mass_2", "length_1", "length_2",
+                  "theta_1", "theta_2", "theta_1_dot", "theta_2_dot")
+
+
+class BatchPendulum:
+    def __init__(self, configs):
+        self.set_parameters({k: [c[k] for c in configs] for k in PARAMETER_KEYS})
+
+    @classmethod
+    def from_arrays(cls, config, n, **arrays):
+        batch = cls.__new__(cls)
+        batch.set_parameters({k: np.broadcast_to(arrays.get(k, config[k]), (n,))
+                              for k in PARAMETER_KEYS})
+        return batch
+
+    def set_parameters(self, columns):
+        self.mass_1 = np.array(columns['mass_1'], dtype=float)
+        self.mass_2 = np.array(columns['mass_2'], dtype=float)
+        self.length_1 = np.array(columns['length_1'], dtype=float)
+        self.length_2 = np.array(columns['length_2'], dtype=float)
+        self.g = 9.81
+        self.y0 = np.radians(np.array([
+            columns['theta_1'],
+            columns['theta_2'],
+            columns['theta_1_dot'],
+            columns['theta_2_dot'],
+        ], dtype=float))
+
+    def __len__(self):
+        return self.y0.shape[1]
+
+    def derivatives(self, t, y, members=None):
+        if members is None:
+            params = (self.mass_1, self.mass_2, self.length_1, self.length_2)
+        else:
+            params = (self.mass_1[members], self.mass_2[members],
+                      self.length_1[members], self.length_2[members])
+        theta_1_ddot, theta_2_ddot = accelerations(y[0], y[1], y[2], y[3], *params, self.g)
+        return np.array([y[2], y[3], theta_1_ddot, theta_2_ddot])
+
+    def rk4_step(self, t, y, h, members=None):
+        slope1 = self.derivatives(t, y, members)
+        slope2 = self.derivatives(t + h / 2, y + h * slope1 / 2, members)
+        slope3 = self.derivatives(t + h / 2, y + h * slope2 / 2, members)
+        slope4 = self.derivatives(t + h, y + h * slope3, members)
+
+        # same operation order as Pendulum.rk4_solver, so results match bit for bit
+        weighted_slope = (slope1 + 2 * slope2 + 2 * slope3 + slope4) / 6
+        return y + h * weighted_slope
+
+    def rk4(self, t_span, steps, output_stride=1, deadline=None):
+        t0, tf = t_span
+        h = (tf - t0) / steps
+        recorded = np.arange(0, steps + 1, output_stride)
+        if recorded[-1] != steps:
+            recorded = np.append(recorded, steps)
+        t_out = t0 + recorded * h
+        y_out = np.zeros((4, len(self), len(t_out)))
+
+        y = self.y0.copy()
+        y_out[:, :, 0] = y
+        out_idx = 1
+        for i in range(steps):
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError("Integration exceeded its time limit")
+            y = self.rk4_step(t0 + i * h, y, h)
+            if (i + 1) % output_stride == 0 or i + 1 == steps:
+                y_out[:, :, out_idx] = y
+                out_idx += 1
+
+        return t_out, y_out
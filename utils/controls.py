@@ -1,6 +1,11 @@
 import copy
 import matplotlib.pyplot as plt
+import numpy as np
+from utils.downsample import downsample
+from utils.ensemble import DivergenceEnsemble
+from utils.monte_carlo import MonteCarloEnsemble
 from utils.pendulum import Pendulum
+from utils.trajectory import Trajectory
 from utils.visualisation import Visualisation
 from utils.visualisation_rk4 import RK4Visualisation, MultiRK4Visualizer
 
@@ -10,7 +15,11 @@ class Controls:
         self.config = config
 
     def run(self):
-        if self.config["multi_pendulum"] and self.config["method"] == "rk4":
+        if self.config.get("monte_carlo"):
+            self.run_monte_carlo()
+        elif self.config.get("divergence_tracking"):
+            self.run_divergence()
+        elif self.config["multi_pendulum"] and self.config["method"] == "rk4":
             self.run_multi_rk4()
         elif self.config["multi_pendulum"]:
             self.run_multi()
@@ -32,7 +41,7 @@ class Controls:
         if self.config["animate"]:
             Visualisation.animate_multiple(pendulums)
         if self.config["plot"]:
-            Visualisation.plot_phase_space(pendulums)
+            Visualisation.plot_phase_space(pendulums, self.config.get("downsample", "minmax"))
         if self.config["energy_plot"]:
             self.plot_energy(pendulums)
 
@@ -44,7 +53,7 @@ class Controls:
             p = Pendulum(cfg)
             pendulums.append(p)
 
-        viz = MultiRK4Visualizer(pendulums)
+        viz = MultiRK4Visualizer(pendulums, self.config.get("downsample", "minmax"))
 
         if self.config["plot"]:
             viz.plot_phase_space()
@@ -53,6 +62,28 @@ class Controls:
         if self.config["animate"]:
             viz.animate_multiple()
 
+    def run_divergence(self):
+        ensemble = DivergenceEnsemble(self.config)
+        for idx, t_div in enumerate(ensemble.divergence_time[1:], start=2):
+            status = f"{t_div:.3f} s" if not np.isnan(t_div) else "not diverged"
+            print(f"Pendulum {idx}: {status}")
+        print(f"Integrated {ensemble.steps_taken} of {ensemble.total_steps} steps")
+
+        if self.config["plot"]:
+            self.plot_divergence(ensemble)
+
+    def run_monte_carlo(self):
+        mc = MonteCarloEnsemble(self.config)
+        print(f"Propagated {mc.count} samples")
+        print(f"Final energy: {mc.mean_of('energy')[-1]:.4f} ± {mc.std('energy')[-1]:.4f} J")
+        outside = mc.outside('energy').max()
+        if outside:
+            print(f"Warning: up to {outside} energies per time point fell outside the histogram "
+                  f"range; quantiles among them are NaN")
+
+        if self.config["plot"]:
+            self.plot_monte_carlo(mc)
+
     def run_single(self):
         p = Pendulum(self.config)
         if self.config["animate"]:
@@ -64,7 +95,7 @@ class Controls:
 
     def run_rk4(self):
         pendulum = Pendulum(self.config)
-        vis = RK4Visualisation(pendulum)
+        vis = RK4Visualisation(pendulum, self.config.get("downsample", "minmax"))
 
         vis.plot_angles()
         vis.plot_energy()
@@ -72,11 +103,11 @@ class Controls:
 
     def plot_energy(self, pendulums):
         plt.figure(figsize=(8, 5))
+        ax = plt.gca()
         for idx, (cfg, sol) in enumerate(pendulums):
-            p = Pendulum(cfg)
-            E = p.compute_energy(sol)
+            E = Trajectory.from_solution(cfg, sol).energy
             label = f"Pendulum {idx + 1}" if len(pendulums) > 1 else "Total Energy"
-            plt.plot(sol.t, E, label=label)
+            ax.plot(*downsample(ax, sol.t, E, self.config.get("downsample", "minmax")), label=label)
 
         plt.xlabel("Time [s]")
         plt.ylabel("Total Energy [J]")
@@ -87,12 +118,45 @@ class Controls:
         plt.tight_layout()
         plt.show()
 
+    def plot_divergence(self, ensemble):
+        plt.figure(figsize=(8, 5))
+        for idx in range(1, ensemble.separation.shape[1]):
+            plt.semilogy(ensemble.t, ensemble.separation[:, idx], label=f"Pendulum {idx + 1}")
+        plt.axhline(ensemble.threshold, color='black', linestyle='--', label="Threshold")
+
+        plt.xlabel("Time [s]")
+        plt.ylabel("Phase-space separation")
+        plt.title("Divergence of Perturbed Pendulums")
+        plt.grid(True)
+        plt.legend()
+        plt.tight_layout()
+        plt.show()
+
+    def plot_monte_carlo(self, mc):
+        fig, axes = plt.subplots(1, 3, figsize=(18, 5))
+
+        for ax, name, label in zip(axes, ("theta_1", "theta_2", "energy"),
+                                   ("θ₁ [rad]", "θ₂ [rad]", "Total Energy [J]")):
+            ax.fill_between(mc.t, mc.quantile(name, 0.05), mc.quantile(name, 0.95),
+                            color='#45B7D1', alpha=0.3, label="5–95%")
+            ax.plot(mc.t, mc.quantile(name, 0.5), color='#45B7D1', label="Median")
+            ax.plot(mc.t, mc.mean_of(name), color='#FF6B6B', label="Mean")
+            ax.set_xlabel("Time [s]")
+            ax.set_ylabel(label)
+            ax.grid(True, alpha=0.3)
+            ax.legend()
+
+        fig.suptitle(f"Monte Carlo Ensemble ({mc.count} samples)")
+        plt.tight_layout()
+        plt.show()
+
     def plot_energy_rk4(self, pendulums):
         plt.figure(figsize=(8, 5))
+        ax = plt.gca()
         for idx, p in enumerate(pendulums):
-            E = p.compute_energy(p.solution_t, p.solution_y)
+            E = p.trajectory.energy
             label = f"Pendulum {idx + 1}" if len(pendulums) > 1 else "Total Energy"
-            plt.plot(p.solution_t, E, label=label)
+            ax.plot(*downsample(ax, p.solution_t, E, self.config.get("downsample", "minmax")), label=label)
 
         plt.xlabel("Time [s]")
         plt.ylabel("Total Energy [J]")
@@ -0,0 +1,75 @@
+import matplotlib.colors
+import numpy as np
+
+
+def minmax_indices(x, y, n_buckets):
+    n = len(y)
+    size = -(-n // n_buckets)
+    padded = n_buckets * size
+    indices = [np.array([0, n - 1])]
+    # buckets are runs of consecutive samples, i.e. pixel columns of a time
+    # axis; parametric curves go through plot_parametric instead
+    for values in (x, y):
+        buckets = np.pad(values, (0, padded - n), mode='edge').reshape(n_buckets, size)
+        offsets = np.arange(n_buckets) * size
+        indices.append(np.minimum(offsets + buckets.argmin(axis=1), n - 1))
+        indices.append(np.minimum(offsets + buckets.argmax(axis=1), n - 1))
+    return np.unique(np.concatenate(indices))
+
+
+def lttb_indices(x, y, n_out):
+    n = len(y)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    indices = np.empty(n_out, dtype=int)
+    indices[0] = 0
+    indices[-1] = n - 1
+
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+
+        prev = indices[i]
+        area = np.abs(
+            (x[prev] - avg_x) * (y[start:end] - y[prev])
+            - (x[prev] - x[start:end]) * (avg_y - y[prev])
+        )
+        indices[i + 1] = start + area.argmax()
+
+    return indices
+
+
+def downsample(ax, x, y, method='minmax'):
+    x = np.asarray(x)
+    y = np.asarray(y)
+    # two points per pixel column is all a rasterised line can show
+    pixels = max(int(ax.bbox.width), 2)
+    if method is None or len(y) <= 4 * pixels:
+        return x, y
+
+    if method == 'minmax':
+        indices = minmax_indices(x, y, pixels)
+    elif method == 'lttb':
+        indices = lttb_indices(x, y, 2 * pixels)
+    else:
+        raise ValueError(f"Unknown downsample method: {method}")
+    return x[indices], y[indices]
+
+
+def plot_parametric(ax, x, y, method='minmax', color='C0', alpha=1.0, label=None, **kwargs):
+    x = np.asarray(x)
+    y = np.asarray(y)
+    width, height = max(int(ax.bbox.width), 2), max(int(ax.bbox.height), 2)
+    if method is None or len(x) <= 4 * width:
+        return ax.plot(x, y, color=color, alpha=alpha, label=label, **kwargs)
+
+    # consecutive samples of a phase portrait can span several oscillations,
+    # so long curves are rasterised onto the pixel grid instead of thinned
+    counts, x_edges, y_edges = np.histogram2d(x, y, bins=(width, height))
+    image = np.zeros((height, width, 4))
+    image[..., :3] = matplotlib.colors.to_rgb(color)
+    image[..., 3] = alpha * np.log1p(counts.T) / np.log1p(counts.max())
+    ax.imshow(image, origin='lower', aspect='auto', interpolation='nearest',
+              extent=(x_edges[0], x_edges[-1], y_edges[0], y_edges[-1]))
+    return ax.plot([], [], color=image[0, 0, :3], alpha=alpha, label=label, **kwargs)
@@ -0,0 +1,120 @@
+import copy
+import numpy as np
+import scipy.integrate
+from utils.batch import BatchPendulum
+
+
+class DivergenceEnsemble:
+    def __init__(self, config):
+        self.config = config
+        self.threshold = config.get('divergence_threshold', 0.1)
+        self.mode = config.get('divergence_mode', 'reference')
+        self.stop_diverged = config.get('stop_diverged', True)
+        if self.mode not in ('reference', 'pairwise'):
+            raise ValueError(f"Unknown divergence_mode: {self.mode}")
+
+        configs = []
+        for i in range(config['num_of_pendulums']):
+            cfg = copy.deepcopy(config)
+            cfg['theta_1'] += i * 0.0001
+            configs.append(cfg)
+        self.batch = BatchPendulum(configs)
+        self.method = config.get('method', 'solve_ivp')
+        if self.method == 'solve_ivp':
+            self.solvers = [self.make_solver(j) for j in range(len(self.batch))]
+
+        self.t, self.separation, self.divergence_time = self.integrate()
+
+    def make_solver(self, j):
+        # each member gets its own adaptive solver, as in run_multi, so its
+        # step sizes do not depend on the rest of the ensemble
+        solver = getattr(scipy.integrate, self.config.get('ivp_method', 'DOP853'))
+        return solver(
+            lambda t, y: self.batch.derivatives(t, y[:, None], [j])[:, 0],
+            self.config['t_span'][0],
+            self.batch.y0[:, j],
+            self.config['t_span'][1],
+            rtol=self.config.get('rtol', 1e-10),
+            atol=self.config.get('atol', 1e-10)
+        )
+
+    def advance(self, y, members, t_current, t_next):
+        if self.method != 'solve_ivp':
+            return self.batch.rk4_step(t_current, y, t_next - t_current, members)
+
+        y_next = np.empty_like(y)
+        for col, j in enumerate(members):
+            solver = self.solvers[j]
+            while solver.t < t_next:
+                message = solver.step()
+                if solver.status == 'failed':
+                    raise RuntimeError(f"Pendulum {j + 1} failed to integrate: {message}")
+            y_next[:, col] = solver.dense_output()(t_next)
+        return y_next
+
+    def measure(self, y):
+        diff = np.zeros_like(y)
+        if self.mode == 'reference':
+            diff[:, 1:] = y[:, 1:] - y[:, :1]
+        else:
+            diff[:, 1:] = y[:, 1:] - y[:, :-1]
+        # a full turn is the same configuration, so angles are compared mod 2π
+        diff[:2] = (diff[:2] + np.pi) % (2 * np.pi) - np.pi
+        return np.sqrt(np.sum(diff ** 2, axis=0))
+
+    def needed(self, pending):
+        # a member is integrated while it is pending or is the partner of one
+        needed = pending.copy()
+        if self.mode == 'reference':
+            needed[0] = pending.any()
+        else:
+            needed[:-1] |= pending[1:]
+        return needed
+
+    def integrate(self):
+        t0, tf = self.config['t_span']
+        steps = self.config['steps']
+        # the same output grid as the single runs of the chosen method
+        if self.method == 'solve_ivp':
+            t = np.linspace(t0, tf, steps)
+        else:
+            t = t0 + np.arange(steps + 1) * (tf - t0) / steps
+        n_members = len(self.batch)
+
+        y = self.batch.y0.copy()
+        separation = np.full((len(t), n_members), np.nan)
+        divergence_time = np.full(n_members, np.nan)
+        tracked = np.ones(n_members, dtype=bool)
+        tracked[0] = False
+
+        for i in range(len(t)):
+            pending = tracked & np.isnan(divergence_time)
+            needed = self.needed(pending) if self.stop_diverged else np.ones(n_members, dtype=bool)
+
+            sep = self.measure(y)
+            separation[i, needed] = sep[needed]
+
+            crossed = pending & (sep > self.threshold)
+            divergence_time[crossed] = t[i]
+
+            if self.stop_diverged:
+                pending &= ~crossed
+                needed = self.needed(pending)
+                if not needed.any():
+                    break
+            if i == len(t) - 1:
+                break
+
+            members = np.flatnonzero(needed)
+            y[:, members] = self.advance(y[:, members], members, t[i], t[i + 1])
+
+        self.steps_taken = i
+        self.total_steps = len(t) - 1
+        return t[:i + 1], separation[:i + 1], divergence_time
+
+    @property
+    def horizon(self):
+        times = self.divergence_time[1:]
+        if np.isnan(times).all():
+            return np.nan
+        return np.nanmin(times)
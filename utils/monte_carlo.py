@@ -0,0 +1,159 @@
+import numpy as np
+from utils.batch import BatchPendulum, PARAMETER_KEYS
+from utils.trajectory import Trajectory
+
+
+VARIABLES = ("theta_1", "theta_2", "theta_1_dot", "theta_2_dot", "energy")
+ANGLES = ("theta_1", "theta_2")
+LINEAR_VARIABLES = ("theta_1_dot", "theta_2_dot", "energy")
+HISTOGRAM_VARIABLES = ("theta_1", "theta_2", "energy")
+
+
+def sample_parameters(config, uncertainty, rng, n):
+    samples = {}
+    for key, (kind, scale) in uncertainty.items():
+        if key not in PARAMETER_KEYS:
+            raise ValueError(f"Cannot sample unknown parameter: {key}")
+        value = config[key]
+        if kind == "normal":
+            samples[key] = value + scale * rng.standard_normal(n)
+        elif kind == "uniform":
+            samples[key] = value + rng.uniform(-scale, scale, n)
+        elif kind == "lognormal":
+            samples[key] = value * np.exp(scale * rng.standard_normal(n))
+        else:
+            raise ValueError(f"Unknown distribution for {key}: {kind}")
+    return samples
+
+
+class MonteCarloEnsemble:
+    def __init__(self, config):
+        self.config = config
+        self.uncertainty = config.get("uncertainty", {})
+        self.samples = config.get("mc_samples", 100000)
+        self.batch_size = config.get("mc_batch_size", 5000)
+        self.bins = config.get("mc_bins", 100)
+        self.rng = np.random.default_rng(config.get("mc_seed"))
+
+        t0, tf = config["t_span"]
+        steps = config["steps"]
+        self.h = (tf - t0) / steps
+        self.stride = max(steps // config.get("mc_output_points", 200), 1)
+        self.t = t0 + np.arange(0, steps + 1, self.stride) * self.h
+
+        n_out = len(self.t)
+        self.count = 0
+        self.mean = np.zeros((len(LINEAR_VARIABLES), n_out))
+        self.m2 = np.zeros((len(LINEAR_VARIABLES), n_out))
+        self.cos_sum = np.zeros((len(ANGLES), n_out))
+        self.sin_sum = np.zeros((len(ANGLES), n_out))
+        self.edges = {
+            "theta_1": np.linspace(-np.pi, np.pi, self.bins + 1),
+            "theta_2": np.linspace(-np.pi, np.pi, self.bins + 1),
+            "energy": self.energy_edges(),
+        }
+        self.histograms = np.zeros((len(HISTOGRAM_VARIABLES), n_out, self.bins), dtype=np.int64)
+        self.underflow = np.zeros((len(HISTOGRAM_VARIABLES), n_out), dtype=np.int64)
+        self.overflow = np.zeros((len(HISTOGRAM_VARIABLES), n_out), dtype=np.int64)
+
+        self.run()
+
+    def make_batch(self, n):
+        return BatchPendulum.from_arrays(self.config, n,
+                                         **sample_parameters(self.config, self.uncertainty, self.rng, n))
+
+    def energy(self, batch, y):
+        return Trajectory(None, y, batch.length_1, batch.length_2,
+                          batch.mass_1, batch.mass_2, batch.g).energy
+
+    def energy_edges(self):
+        # energy is conserved along each trajectory, so the spread of initial
+        # energies in a pilot sample fixes the histogram range up front
+        pilot = self.make_batch(min(self.samples, 10 * self.batch_size))
+        E = self.energy(pilot, pilot.y0)
+        low, high = E.min(), E.max()
+        margin = 0.05 * (high - low) or 0.05 * max(abs(low), 1.0)
+        return np.linspace(low - margin, high + margin, self.bins + 1)
+
+    def observe(self, k, batch, y):
+        # angles that spread across ±π have no meaningful linear mean, so
+        # they are summarised by their mean direction instead
+        self.cos_sum[:, k] += np.cos(y[:2]).sum(axis=1)
+        self.sin_sum[:, k] += np.sin(y[:2]).sum(axis=1)
+
+        values = np.vstack([y[2:], self.energy(batch, y)])
+        # Chan et al. parallel update merges the batch into the running moments
+        n_a, n_b = self.count, values.shape[1]
+        batch_mean = values.mean(axis=1)
+        batch_m2 = ((values - batch_mean[:, None]) ** 2).sum(axis=1)
+        delta = batch_mean - self.mean[:, k]
+        total = n_a + n_b
+        self.mean[:, k] += delta * n_b / total
+        self.m2[:, k] += batch_m2 + delta ** 2 * n_a * n_b / total
+
+        wrapped = (y[:2] + np.pi) % (2 * np.pi) - np.pi
+        observed = {"theta_1": wrapped[0], "theta_2": wrapped[1], "energy": values[-1]}
+        for idx, name in enumerate(HISTOGRAM_VARIABLES):
+            v = observed[name]
+            edges = self.edges[name]
+            below, above = v < edges[0], v > edges[-1]
+            self.underflow[idx, k] += below.sum()
+            self.overflow[idx, k] += above.sum()
+            bins = np.searchsorted(edges, v[~(below | above)], side="right") - 1
+            self.histograms[idx, k] += np.bincount(np.minimum(bins, self.bins - 1),
+                                                   minlength=self.bins)
+
+    def run(self):
+        t0 = self.config["t_span"][0]
+        steps = self.config["steps"]
+        remaining = self.samples
+        while remaining > 0:
+            n = min(self.batch_size, remaining)
+            batch = self.make_batch(n)
+            y = batch.y0.copy()
+            self.observe(0, batch, y)
+            for i in range(steps):
+                y = batch.rk4_step(t0 + i * self.h, y, self.h)
+                if (i + 1) % self.stride == 0:
+                    self.observe((i + 1) // self.stride, batch, y)
+            self.count += n
+            remaining -= n
+
+    def resultant(self, name):
+        idx = ANGLES.index(name)
+        return np.minimum(np.hypot(self.cos_sum[idx], self.sin_sum[idx]) / self.count, 1.0)
+
+    def mean_of(self, name):
+        if name in ANGLES:
+            idx = ANGLES.index(name)
+            return np.arctan2(self.sin_sum[idx], self.cos_sum[idx])
+        return self.mean[LINEAR_VARIABLES.index(name)]
+
+    def variance(self, name):
+        if name in ANGLES:
+            # squared circular standard deviation, which is the variance of a
+            # wrapped normal and tends to the linear variance for small spreads
+            return -2 * np.log(self.resultant(name))
+        return self.m2[LINEAR_VARIABLES.index(name)] / max(self.count - 1, 1)
+
+    def std(self, name):
+        return np.sqrt(self.variance(name))
+
+    def outside(self, name):
+        idx = HISTOGRAM_VARIABLES.index(name)
+        return self.underflow[idx] + self.overflow[idx]
+
+    def quantile(self, name, q):
+        # quantiles are read off the fixed-bin histograms by interpolating
+        # their cumulative counts, so they cost no extra memory
+        idx = HISTOGRAM_VARIABLES.index(name)
+        hist = self.histograms[idx]
+        edges = self.edges[name]
+        below = self.underflow[idx] / self.count
+        above = self.overflow[idx] / self.count
+        cdf = below[:, None] + np.cumsum(hist, axis=1) / self.count
+        cdf = np.hstack([below[:, None], cdf])
+        result = np.array([np.interp(q, c, edges) for c in cdf])
+        # a quantile among samples outside the bin range cannot be located
+        result[(q < below) | (q > 1 - above)] = np.nan
+        return result
@@ -0,0 +1,56 @@
+import numpy as np
+from utils.trajectory import Trajectory
+
+
+class EnergyStats:
+    def __init__(self, config):
+        self.length_1 = config['length_1']
+        self.length_2 = config['length_2']
+        self.mass_1 = config['mass_1']
+        self.mass_2 = config['mass_2']
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def __call__(self, t, y):
+        E = Trajectory(t, y, self.length_1, self.length_2, self.mass_1, self.mass_2).energy
+        # Welford's update keeps the variance stable over millions of steps
+        self.count += 1
+        delta = E - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (E - self.mean)
+        self.min = min(self.min, E)
+        self.max = max(self.max, E)
+
+    @property
+    def std(self):
+        return np.sqrt(self.m2 / self.count) if self.count else np.nan
+
+    @property
+    def drift(self):
+        return self.max - self.min
+
+
+class MaxAngles:
+    def __init__(self):
+        self.theta_1 = 0.0
+        self.theta_2 = 0.0
+
+    def __call__(self, t, y):
+        self.theta_1 = max(self.theta_1, abs(y[0]))
+        self.theta_2 = max(self.theta_2, abs(y[1]))
+
+
+class AngleHistogram:
+    def __init__(self, bins=72):
+        self.edges = np.linspace(-np.pi, np.pi, bins + 1)
+        self.counts = np.zeros((2, bins), dtype=int)
+
+    def __call__(self, t, y):
+        wrapped = (y[:2] + np.pi) % (2 * np.pi) - np.pi
+        idx = np.minimum(((wrapped + np.pi) / (2 * np.pi) * len(self.edges[1:])).astype(int),
+                         len(self.edges) - 2)
+        self.counts[0, idx[0]] += 1
+        self.counts[1, idx[1]] += 1
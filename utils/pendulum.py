@@ -1,8 +1,32 @@
+from functools import cached_property
 import numpy as np
 from scipy.integrate import solve_ivp
+from utils.trajectory import Trajectory
+
+
+def accelerations(theta_1, theta_2, theta_1_dot, theta_2_dot,
+                  mass_1, mass_2, length_1, length_2, g=9.81):
+    M = mass_1 + mass_2
+    delta = theta_1 - theta_2
+    alpha = mass_1 + mass_2 * np.sin(delta)**2
+
+    theta_1_ddot = (-np.sin(delta) *
+                    (mass_2 * length_1 * theta_1_dot**2 * np.cos(delta)
+                     + mass_2 * length_2 * theta_2_dot**2)
+                    - g * (M * np.sin(theta_1)
+                           - mass_2 * np.sin(theta_2) * np.cos(delta))) / (length_1 * alpha)
+
+    theta_2_ddot = (np.sin(delta) *
+                    (M * length_1 * theta_1_dot**2
+                     + mass_2 * length_2 * theta_2_dot**2 * np.cos(delta))
+                    + g * (M * np.sin(theta_1) * np.cos(delta)
+                           - M * np.sin(theta_2))) / (length_2 * alpha)
+
+    return theta_1_ddot, theta_2_ddot
+
 
 class Pendulum:
-    def __init__(self, config):
+    def __init__(self, config, observers=None):
         self.mass_1 = config['mass_1']
         self.mass_2 = config['mass_2']
         self.length_1 = config['length_1']
@@ -14,57 +38,54 @@ class Pendulum:
         self.t_span = config['t_span']
         self.steps = config['steps']
         self.method = config.get('method', 'solve_ivp')
+        self.output_stride = config.get('output_stride', 1)
+        self.output_times = self.check_output_times(config.get('output_times'))
+        self.observers = observers or []
+        self.ivp_method = config.get('ivp_method', 'DOP853')
+        self.rtol = config.get('rtol', 1e-10)
+        self.atol = config.get('atol', 1e-10)
         self.g = 9.81
         if self.method == 'solve_ivp':
+            if self.observers or self.output_stride != 1:
+                raise ValueError("observers and output_stride are only supported with method 'rk4'")
             self.solution = self.simulate()
         else:
+            if self.output_times is not None and self.output_stride != 1:
+                raise ValueError("output_stride cannot be combined with output_times")
             self.solution_t, self.solution_y = self.rk4_solver()
 
+    def check_output_times(self, output_times):
+        if output_times is None:
+            return None
+        t0, tf = self.t_span
+        output_times = np.sort(np.asarray(output_times, dtype=float))
+        if not len(output_times):
+            raise ValueError("output_times must not be empty")
+        if output_times[0] < t0 or output_times[-1] > tf:
+            raise ValueError(f"output_times must lie within t_span {self.t_span}")
+        return output_times
+
+    @cached_property
+    def trajectory(self):
+        if self.method == 'solve_ivp':
+            return Trajectory.from_solution(self.__dict__, self.solution, self.g)
+        return Trajectory(self.solution_t, self.solution_y,
+                          self.length_1, self.length_2,
+                          self.mass_1, self.mass_2, self.g)
+
     def compute_energy(self, *args):
         if len(args) == 1:
             sol = args[0]
-            theta_1, theta_2 = sol.y[0], sol.y[1]
-            theta_1_dot, theta_2_dot = sol.y[2], sol.y[3]
+            t, y = sol.t, sol.y
         else:
             t, y = args
-            theta_1, theta_2 = y[0], y[1]
-            theta_1_dot, theta_2_dot = y[2], y[3]
 
-        delta = theta_1 - theta_2
-
-        M = self.mass_1 + self.mass_2
-
-        kinetic_energy = (
-                0.5 * M * (self.length_1 ** 2) * (theta_1_dot ** 2)
-                + 0.5 * self.mass_2 * (self.length_2 ** 2) * theta_2_dot ** 2
-                + self.mass_2 * self.length_1 * self.length_2 * theta_1_dot * theta_2_dot * np.cos(delta)
-        )
-
-        potential_energy = (
-                -M * self.g * self.length_1 * np.cos(theta_1)
-                - self.mass_2 * self.g * self.length_2 * np.cos(theta_2)
-        )
-
-        return kinetic_energy + potential_energy
+        return Trajectory(t, y, self.length_1, self.length_2,
+                          self.mass_1, self.mass_2, self.g).energy
 
     def double_pendulum(self):
-        M = self.mass_1 + self.mass_2
-        delta = self.theta_1 - self.theta_2
-        alpha = self.mass_1 + self.mass_2 * np.sin(delta)**2
-
-        theta_1_ddot = (-np.sin(delta) *
-                        (self.mass_2 * self.length_1 * self.theta_1_dot**2 * np.cos(delta)
-                         + self.mass_2 * self.length_2 * self.theta_2_dot**2)
-                        - self.g * (M * np.sin(self.theta_1)
-                                    - self.mass_2 * np.sin(self.theta_2) * np.cos(delta))) / (self.length_1 * alpha)
-
-        theta_2_ddot = (np.sin(delta) *
-                        (M * self.length_1 * self.theta_1_dot**2
-                         + self.mass_2 * self.length_2 * self.theta_2_dot**2 * np.cos(delta))
-                        + self.g * (M * np.sin(self.theta_1) * np.cos(delta)
-                                    - M * np.sin(self.theta_2))) / (self.length_2 * alpha)
-
-        return theta_1_ddot, theta_2_ddot
+        return accelerations(self.theta_1, self.theta_2, self.theta_1_dot, self.theta_2_dot,
+                             self.mass_1, self.mass_2, self.length_1, self.length_2, self.g)
 
     def derivatives(self, t, y):
         theta_1, theta_2, theta_1_dot, theta_2_dot = y
@@ -77,35 +98,74 @@ class Pendulum:
 
     def simulate(self):
         y0 = [self.theta_1, self.theta_2, self.theta_1_dot, self.theta_2_dot]
-        t_eval = np.linspace(self.t_span[0], self.t_span[1], self.steps)
+        if self.output_times is None:
+            t_eval = np.linspace(self.t_span[0], self.t_span[1], self.steps)
+        else:
+            t_eval = self.output_times
         return solve_ivp(
             self.derivatives,
             self.t_span,
             y0,
             t_eval=t_eval,
-            method='DOP853',
-            rtol=1e-10,
-            atol=1e-10
+            method=self.ivp_method,
+            rtol=self.rtol,
+            atol=self.atol
         )
 
     def rk4_solver(self):
         t0, tf = self.t_span
         h = (tf -t0)/ self.steps
-        t_vals = np.arange(t0,tf+h/2,h)
-        n_points = len(t_vals)
-        y_vals = np.zeros((n_points, 4))
-        y_vals[0] = [self.theta_1, self.theta_2, self.theta_1_dot,self.theta_2_dot]
-
-        for i in range(n_points -1):
-            t_current = t_vals[i]
-            y_current = y_vals[i]
-            slope1 = np.array(self.derivatives(t_current, y_current))
+        y_current = np.array([self.theta_1, self.theta_2, self.theta_1_dot, self.theta_2_dot])
+
+        if self.output_times is None:
+            recorded = np.arange(0, self.steps + 1, self.output_stride)
+            # the final state is kept even when the stride does not divide steps
+            if recorded[-1] != self.steps:
+                recorded = np.append(recorded, self.steps)
+            t_out = t0 + recorded * h
+        else:
+            t_out = self.output_times
+        y_out = np.zeros((len(t_out), 4))
+        out_idx = 0
+        if self.output_times is None:
+            y_out[0] = y_current
+            out_idx = 1
+
+        for observer in self.observers:
+            observer(t0, y_current)
+
+        slope1 = np.array(self.derivatives(t0, y_current))
+        for i in range(self.steps):
+            t_current = t0 + i * h
             slope2 = np.array(self.derivatives(t_current+ h /2, y_current+ h *slope1 /2))
             slope3 = np.array(self.derivatives(t_current+h /2, y_current+ h *slope2 /2))
             slope4 = np.array(self.derivatives(t_current+h, y_current+h*slope3))
 
             weighted_slope = (slope1 + 2 *slope2 + 2 * slope3 +slope4) /6
 
-            y_vals[i+1] = y_current + h *weighted_slope
-
-        return t_vals, y_vals.T
\ No newline at end of file
+            y_next = y_current + h *weighted_slope
+            # the slope at the end of this step starts the next one
+            slope_next = np.array(self.derivatives(t_current + h, y_next))
+
+            for observer in self.observers:
+                observer(t_current + h, y_next)
+
+            if self.output_times is None:
+                if (i + 1) % self.output_stride == 0 or i + 1 == self.steps:
+                    y_out[out_idx] = y_next
+                    out_idx += 1
+            else:
+                # requested times inside the step use cubic Hermite interpolation
+                while out_idx < len(t_out) and t_out[out_idx] <= t_current + h * (1 + 1e-9):
+                    s = (t_out[out_idx] - t_current) / h
+                    if not -1e-9 <= s <= 1 + 1e-9:
+                        raise RuntimeError(f"Output time {t_out[out_idx]} fell outside step {i}")
+                    y_out[out_idx] = ((2 * s**3 - 3 * s**2 + 1) * y_current
+                                      + (s**3 - 2 * s**2 + s) * h * slope1
+                                      + (-2 * s**3 + 3 * s**2) * y_next
+                                      + (s**3 - s**2) * h * slope_next)
+                    out_idx += 1
+
+            y_current, slope1 = y_next, slope_next
+
+        return t_out[:out_idx], y_out[:out_idx].T
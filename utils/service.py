@@ -0,0 +1,349 @@
+import argparse
+import copy
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+from utils.batch import BatchPendulum, PARAMETER_KEYS
+from utils.pendulum import Pendulum
+
+
+# only these and PARAMETER_KEYS change a trajectory; everything else
+# (plotting flags etc.) is ignored so such requests share cache entries
+GRID_KEYS = ("t_span", "steps", "method", "output_stride", "output_times",
+             "ivp_method", "rtol", "atol")
+GRID_DEFAULTS = {"method": "solve_ivp", "output_stride": 1, "output_times": None,
+                 "ivp_method": "DOP853", "rtol": 1e-10, "atol": 1e-10}
+IVP_METHODS = ("RK23", "RK45", "DOP853", "Radau", "BDF", "LSODA")
+POSITIVE_KEYS = ("mass_1", "mass_2", "length_1", "length_2")
+MAX_STEPS = 10**6
+MAX_POINTS = 10**5
+
+
+class ServiceBusy(Exception):
+    pass
+
+
+class DeadlinePendulum(Pendulum):
+    def __init__(self, config, deadline):
+        self.deadline = deadline
+        super().__init__(config)
+
+    def derivatives(self, t, y):
+        if time.monotonic() > self.deadline:
+            raise TimeoutError("Integration exceeded its time limit")
+        return super().derivatives(t, y)
+
+
+def output_length(config):
+    if config.get("output_times") is not None:
+        return len(config["output_times"])
+    if config["method"] == "solve_ivp":
+        return config["steps"]
+    steps, stride = config["steps"], config["output_stride"]
+    return steps // stride + 1 + (steps % stride != 0)
+
+
+def validate(config, max_steps=MAX_STEPS, max_points=MAX_POINTS):
+    config = dict(config)
+    for k in PARAMETER_KEYS:
+        config[k] = float(config[k])
+        if not np.isfinite(config[k]):
+            raise ValueError(f"{k} must be finite")
+        if k in POSITIVE_KEYS and config[k] <= 0:
+            raise ValueError(f"{k} must be positive")
+
+    t0, tf = (float(v) for v in config["t_span"])
+    if not (np.isfinite(t0) and np.isfinite(tf) and tf > t0):
+        raise ValueError("t_span must be a finite, increasing pair")
+    config["t_span"] = (t0, tf)
+
+    for k in ("steps", "output_stride"):
+        value = float(config.get(k, GRID_DEFAULTS.get(k)))
+        if not value.is_integer() or value <= 0:
+            raise ValueError(f"{k} must be a positive integer")
+        config[k] = int(value)
+    if config["steps"] > max_steps:
+        raise ValueError(f"steps must be at most {max_steps}")
+
+    config["method"] = config.get("method", GRID_DEFAULTS["method"])
+    if config["method"] not in ("rk4", "solve_ivp"):
+        raise ValueError(f"Unknown method: {config['method']}")
+    if config["method"] == "solve_ivp":
+        if config["output_stride"] != 1:
+            raise ValueError("output_stride is only supported with method 'rk4'")
+        if config.get("ivp_method", GRID_DEFAULTS["ivp_method"]) not in IVP_METHODS:
+            raise ValueError(f"Unknown ivp_method: {config['ivp_method']}")
+        for k in ("rtol", "atol"):
+            config[k] = float(config.get(k, GRID_DEFAULTS[k]))
+            if not (np.isfinite(config[k]) and config[k] > 0):
+                raise ValueError(f"{k} must be positive")
+
+    if config.get("output_times") is not None:
+        times = [float(v) for v in config["output_times"]]
+        if not times:
+            raise ValueError("output_times must not be empty")
+        if config["output_stride"] != 1:
+            raise ValueError("output_stride cannot be combined with output_times")
+        if not all(t0 <= v <= tf for v in times):
+            raise ValueError("output_times must lie within t_span")
+        config["output_times"] = sorted(times)
+    if output_length(config) > max_points:
+        raise ValueError(f"output must have at most {max_points} points")
+    return config
+
+
+def request_keys(config):
+    grid = {k: config.get(k, GRID_DEFAULTS.get(k)) for k in GRID_KEYS}
+    grid["t_span"] = list(grid["t_span"])
+    physics = {k: config[k] for k in PARAMETER_KEYS}
+    grid_key = json.dumps(grid, sort_keys=True)
+    return grid_key, json.dumps([grid_key, physics], sort_keys=True)
+
+
+def check_result(t, y):
+    t, y = np.asarray(t, dtype=float), np.asarray(y, dtype=float)
+    if not np.all(np.isfinite(y)):
+        raise ValueError("Integration produced non-finite values")
+    return t, y
+
+
+class SimulationService:
+    def __init__(self, window=0.01, max_batch=256, max_pending=1024,
+                 workers=2, cache_size=1024, time_limit=30.0,
+                 max_steps=MAX_STEPS, max_points=MAX_POINTS, max_batch_points=4 * 10**6):
+        self.window = window
+        self.max_batch = max_batch
+        self.max_steps = max_steps
+        self.max_points = max_points
+        self.max_batch_points = max_batch_points
+        self.max_pending = max_pending
+        self.cache_size = cache_size
+        self.time_limit = time_limit
+        self.cache = OrderedDict()
+        self.in_flight = {}
+        self.queue = []
+        self.condition = threading.Condition()
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.stats = {"requests": 0, "cache_hits": 0, "batches": 0, "integrated": 0, "failed": 0}
+        self.running = True
+        self.batcher = threading.Thread(target=self.batch_loop, daemon=True)
+        self.batcher.start()
+
+    def submit(self, config):
+        config = validate(config, self.max_steps, self.max_points)
+        grid_key, key = request_keys(config)
+        with self.condition:
+            self.stats["requests"] += 1
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                self.stats["cache_hits"] += 1
+                future = Future()
+                future.set_result(self.cache[key])
+                return future
+            # an identical request already queued or running shares its result
+            if key in self.in_flight:
+                return self.in_flight[key]
+            if len(self.in_flight) >= self.max_pending:
+                raise ServiceBusy(f"{len(self.in_flight)} requests pending")
+
+            future = Future()
+            self.in_flight[key] = future
+            self.queue.append((grid_key, key, config))
+            self.condition.notify()
+            return future
+
+    def batch_loop(self):
+        while self.running:
+            with self.condition:
+                while not self.queue and self.running:
+                    self.condition.wait()
+                if not self.running:
+                    return
+                # give concurrent requests a short window to join the batch
+                deadline = time.monotonic() + self.window
+                while len(self.queue) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.condition.wait(remaining)
+                batch, self.queue = self.queue[:self.max_batch], self.queue[self.max_batch:]
+
+            groups = {}
+            for grid_key, key, config in batch:
+                groups.setdefault(grid_key, []).append((key, config))
+            for items in groups.values():
+                cfg = items[0][1]
+                # fixed-step RK4 gives every member the same steps whatever the
+                # batch holds; adaptive solves get their own error control
+                if cfg["method"] == "rk4" and cfg.get("output_times") is None:
+                    # the batch output is allocated up front, so cap its size
+                    size = max(self.max_batch_points // output_length(cfg), 1)
+                    for start in range(0, len(items), size):
+                        self.executor.submit(self.integrate_batch, items[start:start + size])
+                else:
+                    for item in items:
+                        self.executor.submit(self.integrate_one, item)
+
+    def finish(self, key, result=None, exc=None):
+        with self.condition:
+            future = self.in_flight.pop(key)
+            if exc is None:
+                self.stats["integrated"] += 1
+                self.cache[key] = result
+                self.cache.move_to_end(key)
+                while len(self.cache) > self.cache_size:
+                    self.cache.popitem(last=False)
+            else:
+                self.stats["failed"] += 1
+        if exc is None:
+            future.set_result(result)
+        else:
+            future.set_exception(exc)
+
+    def integrate_one(self, item):
+        key, cfg = item
+        try:
+            p = DeadlinePendulum(cfg, time.monotonic() + self.time_limit)
+            if p.method == "solve_ivp":
+                if p.solution.status < 0:
+                    raise RuntimeError(f"solve_ivp failed: {p.solution.message}")
+                result = check_result(p.solution.t, p.solution.y)
+            else:
+                result = check_result(p.solution_t, p.solution_y)
+        except Exception as exc:
+            self.finish(key, exc=exc)
+            return
+        self.finish(key, result)
+
+    def integrate_batch(self, items):
+        cfg = items[0][1]
+        try:
+            batch = BatchPendulum([config for _, config in items])
+            t, y = batch.rk4(cfg["t_span"], cfg["steps"], cfg["output_stride"],
+                             time.monotonic() + self.time_limit)
+            if len(items) == 1:
+                check_result(t, y)
+        except TimeoutError as exc:
+            # fixed-step cost does not depend on the members, so a retry would
+            # only time out again
+            for key, _ in items:
+                self.finish(key, exc=exc)
+            return
+        except Exception as exc:
+            if len(items) == 1:
+                self.finish(items[0][0], exc=exc)
+                return
+            # one bad member must not fail the others, so retry them singly
+            for item in items:
+                self.integrate_batch([item])
+            return
+
+        with self.condition:
+            self.stats["batches"] += 1
+        for idx, item in enumerate(items):
+            if np.all(np.isfinite(y[:, idx])):
+                self.finish(item[0], (t, y[:, idx].copy()))
+            else:
+                self.integrate_batch([item])
+
+    def simulate(self, config, timeout=None):
+        return self.submit(config).result(timeout)
+
+    def shutdown(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        self.batcher.join()
+        self.executor.shutdown()
+
+
+class SimulationServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+def make_handler(service, base_config):
+    class SimulationHandler(BaseHTTPRequestHandler):
+        def send_json(self, status, payload, headers=None):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path != "/health":
+                self.send_json(404, {"error": "not found"})
+                return
+            with service.condition:
+                stats = dict(service.stats, pending=len(service.in_flight),
+                             cached=len(service.cache))
+            self.send_json(200, stats)
+
+        def do_POST(self):
+            if self.path != "/simulate":
+                self.send_json(404, {"error": "not found"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                cfg = copy.deepcopy(base_config)
+                cfg.update(json.loads(self.rfile.read(length) or b"{}"))
+                future = service.submit(cfg)
+            except ServiceBusy as exc:
+                self.send_json(503, {"error": str(exc)}, {"Retry-After": "1"})
+                return
+            except (ValueError, KeyError, TypeError) as exc:
+                self.send_json(400, {"error": f"invalid request: {exc}"})
+                return
+
+            try:
+                t, y = future.result()
+            except TimeoutError as exc:
+                self.send_json(504, {"error": str(exc)})
+                return
+            except Exception as exc:
+                self.send_json(500, {"error": str(exc)})
+                return
+            self.send_json(200, {"t": t.tolist(), "y": np.asarray(y).tolist()})
+
+        def log_message(self, format, *args):
+            pass
+
+    return SimulationHandler
+
+
+def serve(host="127.0.0.1", port=8765, base_config=None, **kwargs):
+    service = SimulationService(**kwargs)
+    server = SimulationServer((host, port), make_handler(service, base_config or {}))
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        service.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Batched double pendulum simulation service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--window", type=float, default=0.01)
+    parser.add_argument("--max-batch", type=int, default=256)
+    parser.add_argument("--max-pending", type=int, default=1024)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--time-limit", type=float, default=30.0)
+    parser.add_argument("--max-steps", type=int, default=MAX_STEPS)
+    parser.add_argument("--max-points", type=int, default=MAX_POINTS)
+    args = parser.parse_args()
+
+    from config import config
+    print(f"Serving on http://{args.host}:{args.port}/simulate")
+    serve(args.host, args.port, config, window=args.window, max_batch=args.max_batch,
+          max_pending=args.max_pending, workers=args.workers, time_limit=args.time_limit,
+          max_steps=args.max_steps, max_points=args.max_points)
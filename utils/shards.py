@@ -0,0 +1,255 @@
+import argparse
+import copy
+import json
+import multiprocessing
+import os
+import socket
+import threading
+import time
+import uuid
+import numpy as np
+from utils.pendulum import Pendulum
+
+
+def ensemble_overrides(config):
+    return [{"theta_1": config["theta_1"] + i * 0.0001}
+            for i in range(config["num_of_pendulums"])]
+
+
+def sweep_overrides(key, values):
+    return [{key: value} for value in values]
+
+
+def simulate_job(config):
+    p = Pendulum(config)
+    if p.method == 'solve_ivp':
+        return p.solution.t, p.solution.y
+    return p.solution_t, p.solution_y
+
+
+class ShardManifest:
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, "manifest.json")) as f:
+            manifest = json.load(f)
+        self.config = manifest["config"]
+        self.shards = manifest["shards"]
+
+    @classmethod
+    def create(cls, directory, config, overrides, shard_size=10):
+        os.makedirs(os.path.join(directory, "locks"), exist_ok=True)
+        os.makedirs(os.path.join(directory, "results"), exist_ok=True)
+        shards = [
+            {"id": f"shard_{idx:05d}", "jobs": overrides[start:start + shard_size]}
+            for idx, start in enumerate(range(0, len(overrides), shard_size))
+        ]
+        manifest = {"config": config, "shards": shards}
+
+        path = os.path.join(directory, "manifest.json")
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp, path)
+        return cls(directory)
+
+    def lock_path(self, shard_id):
+        return os.path.join(self.directory, "locks", f"{shard_id}.lock")
+
+    def result_path(self, shard_id):
+        return os.path.join(self.directory, "results", f"{shard_id}.npz")
+
+    def pending(self):
+        return [s for s in self.shards if not os.path.exists(self.result_path(s["id"]))]
+
+    def lock_token(self, shard_id):
+        try:
+            with open(self.lock_path(shard_id)) as f:
+                return json.load(f).get("token")
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def claim(self, shard_id, lease):
+        path = self.lock_path(shard_id)
+        try:
+            age = time.time() - os.path.getmtime(path)
+        except FileNotFoundError:
+            age = None
+        if age is not None and (age < lease or not self.reclaim(shard_id, lease)):
+            return None
+
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return None
+        token = uuid.uuid4().hex
+        with os.fdopen(fd, "w") as f:
+            json.dump({"token": token, "host": socket.gethostname(),
+                       "pid": os.getpid(), "time": time.time()}, f)
+        return token
+
+    def reclaim(self, shard_id, lease):
+        # the holder stopped heartbeating; move its lock aside so only one
+        # reclaiming worker can win the rename
+        path = self.lock_path(shard_id)
+        aside = f"{path}.{uuid.uuid4().hex}.stale"
+        try:
+            os.rename(path, aside)
+        except FileNotFoundError:
+            return False
+
+        # between our age check and the rename another worker may already
+        # have reclaimed the shard, in which case we just moved its fresh
+        # lock; put it back unless someone else has created one meanwhile
+        if time.time() - os.path.getmtime(aside) < lease:
+            try:
+                os.link(aside, path)
+            except FileExistsError:
+                pass
+            os.remove(aside)
+            return False
+
+        os.remove(aside)
+        return True
+
+    def touch(self, shard_id, token):
+        try:
+            with open(self.lock_path(shard_id)) as f:
+                if json.load(f).get("token") != token:
+                    return False
+                # refresh the inode that was just verified, not the path
+                os.utime(f.fileno())
+                return True
+        except (FileNotFoundError, ValueError):
+            return False
+
+    def release(self, shard_id, token):
+        if self.lock_token(shard_id) != token:
+            return
+        try:
+            os.remove(self.lock_path(shard_id))
+        except FileNotFoundError:
+            pass
+
+    def job_config(self, overrides):
+        cfg = copy.deepcopy(self.config)
+        cfg.update(overrides)
+        return cfg
+
+    def run_shard(self, shard):
+        ts, ys = [], []
+        for overrides in shard["jobs"]:
+            t, y = simulate_job(self.job_config(overrides))
+            ts.append(t)
+            ys.append(y)
+
+        # results are published with a rename, so a shard that was processed
+        # twice after a lease expiry still leaves one complete file
+        path = self.result_path(shard["id"])
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp.npz"
+        np.savez(tmp, t=np.array(ts), y=np.array(ys))
+        os.replace(tmp, path)
+
+    def merge(self, path=None):
+        pending = self.pending()
+        if pending:
+            raise RuntimeError(f"{len(pending)} shards have not finished")
+
+        ts, ys, overrides = [], [], []
+        for shard in self.shards:
+            with np.load(self.result_path(shard["id"])) as data:
+                ts.append(data["t"])
+                ys.append(data["y"])
+            overrides.extend(shard["jobs"])
+        if len({t.shape[1] for t in ts}) > 1:
+            raise ValueError("Shards produced trajectories of different lengths")
+
+        result = {
+            "t": np.concatenate(ts),
+            "y": np.concatenate(ys),
+            "overrides": np.array([json.dumps(o) for o in overrides]),
+        }
+        np.savez(path or os.path.join(self.directory, "merged.npz"), **result)
+        return result
+
+
+class ShardWorker:
+    def __init__(self, directory, lease=60.0, poll=1.0):
+        self.manifest = ShardManifest(directory)
+        self.lease = lease
+        self.poll = poll
+
+    def heartbeat(self, shard_id, token, stop):
+        while not stop.wait(self.lease / 3):
+            if not self.manifest.touch(shard_id, token):
+                return
+
+    def process(self, shard, token):
+        stop = threading.Event()
+        beat = threading.Thread(target=self.heartbeat, args=(shard["id"], token, stop),
+                                daemon=True)
+        beat.start()
+        try:
+            self.manifest.run_shard(shard)
+        finally:
+            stop.set()
+            beat.join()
+            self.manifest.release(shard["id"], token)
+
+    def run(self):
+        completed = 0
+        while True:
+            pending = self.manifest.pending()
+            if not pending:
+                return completed
+
+            claimed = False
+            for shard in pending:
+                token = self.manifest.claim(shard["id"], self.lease)
+                if token is None:
+                    continue
+                claimed = True
+                # another worker may have finished it since pending() was read
+                if os.path.exists(self.manifest.result_path(shard["id"])):
+                    self.manifest.release(shard["id"], token)
+                    continue
+                self.process(shard, token)
+                completed += 1
+
+            # everything left is held by other workers; wait for them to
+            # finish or for their leases to run out
+            if not claimed:
+                time.sleep(self.poll)
+
+
+def _run_worker(directory, lease, poll):
+    ShardWorker(directory, lease, poll).run()
+
+
+def run_local_workers(directory, num_workers, lease=60.0, poll=1.0):
+    workers = [multiprocessing.Process(target=_run_worker, args=(directory, lease, poll))
+               for _ in range(num_workers)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return ShardManifest(directory).merge()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sharded double pendulum ensembles")
+    parser.add_argument("action", choices=["create", "worker", "local", "merge"])
+    parser.add_argument("directory")
+    parser.add_argument("--shard-size", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--lease", type=float, default=60.0)
+    args = parser.parse_args()
+
+    if args.action == "create":
+        from config import config
+        ShardManifest.create(args.directory, config, ensemble_overrides(config), args.shard_size)
+    elif args.action == "worker":
+        print(f"Processed {ShardWorker(args.directory, args.lease).run()} shards")
+    elif args.action == "local":
+        run_local_workers(args.directory, args.workers, args.lease)
+    else:
+        ShardManifest(args.directory).merge()
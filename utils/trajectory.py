@@ -0,0 +1,124 @@
+import weakref
+from functools import cached_property
+import numpy as np
+
+
+# trajectories of solve_ivp results, keyed by the result's id and dropped
+# when the result is garbage collected, so the caller's object is untouched
+_solution_cache = {}
+
+
+class Trajectory:
+    def __init__(self, t, y, length_1, length_2, mass_1, mass_2, g=9.81):
+        self.t = t
+        self.y = y
+        self.length_1 = length_1
+        self.length_2 = length_2
+        self.mass_1 = mass_1
+        self.mass_2 = mass_2
+        self.g = g
+
+    @classmethod
+    def from_solution(cls, config, solution, g=9.81):
+        params = (config['length_1'], config['length_2'],
+                  config['mass_1'], config['mass_2'], config.get('g', g))
+        key = id(solution)
+        cached = _solution_cache.get(key)
+        if cached is not None and cached[0]() is solution and cached[1] == params:
+            return cached[2]
+
+        trajectory = cls(solution.t, solution.y, *params)
+        if cached is None:
+            weakref.finalize(solution, _solution_cache.pop, key, None)
+        _solution_cache[key] = (weakref.ref(solution), params, trajectory)
+        return trajectory
+
+    @property
+    def theta_1(self):
+        return self.y[0]
+
+    @property
+    def theta_2(self):
+        return self.y[1]
+
+    @property
+    def theta_1_dot(self):
+        return self.y[2]
+
+    @property
+    def theta_2_dot(self):
+        return self.y[3]
+
+    @cached_property
+    def sin_theta_1(self):
+        return np.sin(self.theta_1)
+
+    @cached_property
+    def cos_theta_1(self):
+        return np.cos(self.theta_1)
+
+    @cached_property
+    def sin_theta_2(self):
+        return np.sin(self.theta_2)
+
+    @cached_property
+    def cos_theta_2(self):
+        return np.cos(self.theta_2)
+
+    @cached_property
+    def cos_delta(self):
+        # cos(a - b) = cos a cos b + sin a sin b, reusing the cached terms
+        return self.cos_theta_1 * self.cos_theta_2 + self.sin_theta_1 * self.sin_theta_2
+
+    @cached_property
+    def x1(self):
+        return self.length_1 * self.sin_theta_1
+
+    @cached_property
+    def y1(self):
+        return -self.length_1 * self.cos_theta_1
+
+    @cached_property
+    def x2(self):
+        return self.x1 + self.length_2 * self.sin_theta_2
+
+    @cached_property
+    def y2(self):
+        return self.y1 - self.length_2 * self.cos_theta_2
+
+    @cached_property
+    def kinetic_energy(self):
+        M = self.mass_1 + self.mass_2
+        return (
+                0.5 * M * (self.length_1 ** 2) * (self.theta_1_dot ** 2)
+                + 0.5 * self.mass_2 * (self.length_2 ** 2) * self.theta_2_dot ** 2
+                + self.mass_2 * self.length_1 * self.length_2
+                * self.theta_1_dot * self.theta_2_dot * self.cos_delta
+        )
+
+    @cached_property
+    def potential_energy(self):
+        M = self.mass_1 + self.mass_2
+        return (
+                -M * self.g * self.length_1 * self.cos_theta_1
+                - self.mass_2 * self.g * self.length_2 * self.cos_theta_2
+        )
+
+    @cached_property
+    def energy(self):
+        return self.kinetic_energy + self.potential_energy
+
+    @cached_property
+    def momentum_1(self):
+        M = self.mass_1 + self.mass_2
+        return (
+                M * self.length_1 ** 2 * self.theta_1_dot
+                + self.mass_2 * self.length_1 * self.length_2 * self.theta_2_dot * self.cos_delta
+        )
+
+    @cached_property
+    def momentum_2(self):
+        return (
+                self.mass_2 * self.length_2 ** 2 * self.theta_2_dot
+                + self.mass_2 * self.length_1 * self.length_2 * self.theta_1_dot * self.cos_delta
+        )
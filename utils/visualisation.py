@@ -1,7 +1,8 @@
 import matplotlib.pyplot as plt
 import matplotlib.animation as animation
-import numpy as np
 from collections import deque
+from utils.downsample import downsample, plot_parametric
+from utils.trajectory import Trajectory
 
 
 class Visualisation:
@@ -12,6 +13,7 @@ class Visualisation:
         self.mass_2 = config['mass_2']
         self.interval = config['interval']
         self.num_of_pendulums = config['num_of_pendulums']
+        self.downsample_method = config.get('downsample', 'minmax')
         self.solution = solution
 
 
@@ -19,8 +21,9 @@ class Visualisation:
         t = self.solution.t
         theta1, theta2 = self.solution.y[0], self.solution.y[1]
 
-        plt.plot(t, theta1, label='θ₁(t)')
-        plt.plot(t, theta2, label='θ₂(t)')
+        ax = plt.gca()
+        ax.plot(*downsample(ax, t, theta1, self.downsample_method), label='θ₁(t)')
+        ax.plot(*downsample(ax, t, theta2, self.downsample_method), label='θ₂(t)')
         plt.xlabel("Time")
         plt.ylabel("Angle")
         plt.title("Double Pendulum Angles")
@@ -38,17 +41,10 @@ class Visualisation:
         colors = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FECA57']
 
         for idx, (config, sol) in enumerate(pendulums):
-            l1 = config['length_1']
-            l2 = config['length_2']
             color = colors[idx % len(colors)]
 
-            theta1 = sol.y[0]
-            theta2 = sol.y[1]
-
-            x1 = l1 * np.sin(theta1)
-            y1 = -l1 * np.cos(theta1)
-            x2 = x1 + l2 * np.sin(theta2)
-            y2 = y1 - l2 * np.cos(theta2)
+            traj = Trajectory.from_solution(config, sol)
+            x1, y1, x2, y2 = traj.x1, traj.y1, traj.x2, traj.y2
 
             ax1.plot(x1, y1, color=color, alpha=0.7, linewidth=1,
                      label=f'Pendulum {idx + 1} (Mass 1)')
@@ -84,7 +80,7 @@ class Visualisation:
         return fig
 
     @staticmethod
-    def plot_phase_space(pendulums):
+    def plot_phase_space(pendulums, downsample_method='minmax'):
         fig, (ax1, ax2, ax3) = plt.subplots(1, 3, figsize=(18, 5))
 
         colors = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FECA57']
@@ -97,18 +93,18 @@ class Visualisation:
             theta1_dot = sol.y[2]
             theta2_dot = sol.y[3]
 
-            ax1.plot(theta1, theta1_dot, color=color, alpha=0.7, linewidth=1,
-                     label=f'Pendulum {idx + 1}')
+            plot_parametric(ax1, theta1, theta1_dot, downsample_method, color=color, alpha=0.7, linewidth=1,
+                            label=f'Pendulum {idx + 1}')
             ax1.scatter(theta1[0], theta1_dot[0], color=color, s=30, marker='o',
                         edgecolors='black', zorder=5)
 
-            ax2.plot(theta2, theta2_dot, color=color, alpha=0.7, linewidth=1,
-                     label=f'Pendulum {idx + 1}')
+            plot_parametric(ax2, theta2, theta2_dot, downsample_method, color=color, alpha=0.7, linewidth=1,
+                            label=f'Pendulum {idx + 1}')
             ax2.scatter(theta2[0], theta2_dot[0], color=color, s=30, marker='o',
                         edgecolors='black', zorder=5)
 
-            ax3.plot(theta1, theta2, color=color, alpha=0.7, linewidth=1,
-                     label=f'Pendulum {idx + 1}')
+            plot_parametric(ax3, theta1, theta2, downsample_method, color=color, alpha=0.7, linewidth=1,
+                            label=f'Pendulum {idx + 1}')
             ax3.scatter(theta1[0], theta2[0], color=color, s=30, marker='o',
                         edgecolors='black', zorder=5)
 
@@ -157,19 +153,12 @@ class Visualisation:
         trajectory_length = int(5.0 / dt)
 
         for idx, (config, sol) in enumerate(pendulums):
-            l1 = config['length_1']
-            l2 = config['length_2']
             m1 = config['mass_1']
             m2 = config['mass_2']
             color = colors[idx % len(colors)]
 
-            theta1 = sol.y[0]
-            theta2 = sol.y[1]
-
-            x1 = l1 * np.sin(theta1)
-            y1 = -l1 * np.cos(theta1)
-            x2 = x1 + l2 * np.sin(theta2)
-            y2 = y1 - l2 * np.cos(theta2)
+            traj = Trajectory.from_solution(config, sol)
+            x1, y1, x2, y2 = traj.x1, traj.y1, traj.x2, traj.y2
 
             line, = ax.plot([], [], '-', lw=2, color=color, alpha=0.8)
 
@@ -2,15 +2,18 @@ import matplotlib.pyplot as plt
 import matplotlib.animation as animation
 import numpy as np
 from collections import deque
+from utils.downsample import downsample, plot_parametric
 
 
 class RK4Visualisation:
-    def __init__(self, pendulum):
+    def __init__(self, pendulum, downsample_method='minmax'):
         self.pendulum = pendulum
+        self.downsample_method = downsample_method
         self.t = pendulum.solution_t
         self.y = pendulum.solution_y
         self.theta_1 = self.y[0]
         self.theta_2 = self.y[1]
+        self.trajectory = pendulum.trajectory
         self.l1 = pendulum.length_1
         self.l2 = pendulum.length_2
         self.m1 = pendulum.mass_1
@@ -19,8 +22,11 @@ class RK4Visualisation:
 
     def plot_angles(self):
         plt.figure(figsize=(10, 5))
-        plt.plot(self.t, np.degrees(self.theta_1), label='θ1 [deg]', color='#FF6B6B', linewidth=2)
-        plt.plot(self.t, np.degrees(self.theta_2), label='θ2 [deg]', color='#4ECDC4', linewidth=2)
+        ax = plt.gca()
+        ax.plot(*downsample(ax, self.t, np.degrees(self.theta_1), self.downsample_method),
+                label='θ1 [deg]', color='#FF6B6B', linewidth=2)
+        ax.plot(*downsample(ax, self.t, np.degrees(self.theta_2), self.downsample_method),
+                label='θ2 [deg]', color='#4ECDC4', linewidth=2)
         plt.xlabel("Time [s]")
         plt.ylabel("Angle [degrees]")
         plt.title("Double Pendulum Angles (RK4)")
@@ -30,9 +36,11 @@ class RK4Visualisation:
         plt.show()
 
     def plot_energy(self):
-        E = self.pendulum.compute_energy(self.t, self.y)
+        E = self.trajectory.energy
         plt.figure(figsize=(10, 5))
-        plt.plot(self.t, E, label="Total Energy", color='#45B7D1', linewidth=2)
+        ax = plt.gca()
+        ax.plot(*downsample(ax, self.t, E, self.downsample_method),
+                label="Total Energy", color='#45B7D1', linewidth=2)
         plt.xlabel("Time [s]")
         plt.ylabel("Energy [J]")
         plt.title("Total Mechanical Energy (RK4)")
@@ -45,10 +53,8 @@ class RK4Visualisation:
     def plot_trajectories(self):
         fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
 
-        x1 = self.l1 * np.sin(self.theta_1)
-        y1 = -self.l1 * np.cos(self.theta_1)
-        x2 = x1 + self.l2 * np.sin(self.theta_2)
-        y2 = y1 - self.l2 * np.cos(self.theta_2)
+        traj = self.trajectory
+        x1, y1, x2, y2 = traj.x1, traj.y1, traj.x2, traj.y2
 
         ax1.plot(x1, y1, color='#FF6B6B', alpha=0.7, linewidth=2, label='Mass 1 Trajectory')
         ax1.scatter(x1[0], y1[0], color='#FF6B6B', s=100, marker='o',
@@ -86,7 +92,8 @@ class RK4Visualisation:
         theta1_dot = self.y[2]
         theta2_dot = self.y[3]
 
-        ax1.plot(self.theta_1, theta1_dot, color='#FF6B6B', alpha=0.7, linewidth=2)
+        plot_parametric(ax1, self.theta_1, theta1_dot, self.downsample_method,
+                        color='#FF6B6B', alpha=0.7, linewidth=2)
         ax1.scatter(self.theta_1[0], theta1_dot[0], color='#FF6B6B', s=50,
                     marker='o', edgecolors='black', zorder=5)
         ax1.set_xlabel('θ_1 (rad)')
@@ -94,7 +101,8 @@ class RK4Visualisation:
         ax1.set_title('Phase Space: First Pendulum (RK4)')
         ax1.grid(True, alpha=0.3)
 
-        ax2.plot(self.theta_2, theta2_dot, color='#4ECDC4', alpha=0.7, linewidth=2)
+        plot_parametric(ax2, self.theta_2, theta2_dot, self.downsample_method,
+                        color='#4ECDC4', alpha=0.7, linewidth=2)
         ax2.scatter(self.theta_2[0], theta2_dot[0], color='#4ECDC4', s=50,
                     marker='o', edgecolors='black', zorder=5)
         ax2.set_xlabel('θ_2 (rad)')
@@ -102,7 +110,8 @@ class RK4Visualisation:
         ax2.set_title('Phase Space: Second Pendulum (RK4)')
         ax2.grid(True, alpha=0.3)
 
-        ax3.plot(self.theta_1, self.theta_2, color='#45B7D1', alpha=0.7, linewidth=2)
+        plot_parametric(ax3, self.theta_1, self.theta_2, self.downsample_method,
+                        color='#45B7D1', alpha=0.7, linewidth=2)
         ax3.scatter(self.theta_1[0], self.theta_2[0], color='#45B7D1', s=50,
                     marker='o', edgecolors='black', zorder=5)
         ax3.set_xlabel('θ_1 (rad)')
@@ -110,10 +119,10 @@ class RK4Visualisation:
         ax3.set_title('Configuration Space (RK4)')
         ax3.grid(True, alpha=0.3)
 
-        ax4.plot(self.t, np.degrees(self.theta_1), color='#FF6B6B',
-                 label='θ_1', linewidth=2)
-        ax4.plot(self.t, np.degrees(self.theta_2), color='#4ECDC4',
-                 label='θ_2', linewidth=2)
+        ax4.plot(*downsample(ax4, self.t, np.degrees(self.theta_1), self.downsample_method),
+                 color='#FF6B6B', label='θ_1', linewidth=2)
+        ax4.plot(*downsample(ax4, self.t, np.degrees(self.theta_2), self.downsample_method),
+                 color='#4ECDC4', label='θ_2', linewidth=2)
         ax4.set_xlabel('Time (s)')
         ax4.set_ylabel('Angle (degrees)')
         ax4.set_title('Time Evolution (RK4)')
@@ -125,10 +134,8 @@ class RK4Visualisation:
         return fig
 
     def animate_motion(self):
-        x1 = self.l1 * np.sin(self.theta_1)
-        y1 = -self.l1 * np.cos(self.theta_1)
-        x2 = x1 + self.l2 * np.sin(self.theta_2)
-        y2 = y1 - self.l2 * np.cos(self.theta_2)
+        traj = self.trajectory
+        x1, y1, x2, y2 = traj.x1, traj.y1, traj.x2, traj.y2
 
         fig, ax = plt.subplots(figsize=(10, 8))
         ax.set_xlim(-self.l1 - self.l2 - 0.5, self.l1 + self.l2 + 0.5)
@@ -189,8 +196,9 @@ class RK4Visualisation:
 
 
 class MultiRK4Visualizer:
-    def __init__(self, pendulums):
+    def __init__(self, pendulums, downsample_method='minmax'):
         self.pendulums = pendulums
+        self.downsample_method = downsample_method
         self.colors = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FECA57']
 
     def plot_trajectories(self):
@@ -199,13 +207,8 @@ class MultiRK4Visualizer:
         for idx, pendulum in enumerate(self.pendulums):
             color = self.colors[idx % len(self.colors)]
 
-            theta1 = pendulum.solution_y[0]
-            theta2 = pendulum.solution_y[1]
-
-            x1 = pendulum.length_1 * np.sin(theta1)
-            y1 = -pendulum.length_1 * np.cos(theta1)
-            x2 = x1 + pendulum.length_2 * np.sin(theta2)
-            y2 = y1 - pendulum.length_2 * np.cos(theta2)
+            traj = pendulum.trajectory
+            x1, y1, x2, y2 = traj.x1, traj.y1, traj.x2, traj.y2
 
             ax1.plot(x1, y1, color=color, alpha=0.7, linewidth=2,
                      label=f'Pendulum {idx + 1} (Mass 1)')
@@ -250,18 +253,18 @@ class MultiRK4Visualizer:
             theta1_dot = pendulum.solution_y[2]
             theta2_dot = pendulum.solution_y[3]
 
-            ax1.plot(theta1, theta1_dot, color=color, alpha=0.7, linewidth=2,
-                     label=f'Pendulum {idx + 1}')
+            plot_parametric(ax1, theta1, theta1_dot, self.downsample_method, color=color, alpha=0.7, linewidth=2,
+                            label=f'Pendulum {idx + 1}')
             ax1.scatter(theta1[0], theta1_dot[0], color=color, s=30, marker='o',
                         edgecolors='black', zorder=5)
 
-            ax2.plot(theta2, theta2_dot, color=color, alpha=0.7, linewidth=2,
-                     label=f'Pendulum {idx + 1}')
+            plot_parametric(ax2, theta2, theta2_dot, self.downsample_method, color=color, alpha=0.7, linewidth=2,
+                            label=f'Pendulum {idx + 1}')
             ax2.scatter(theta2[0], theta2_dot[0], color=color, s=30, marker='o',
                         edgecolors='black', zorder=5)
 
-            ax3.plot(theta1, theta2, color=color, alpha=0.7, linewidth=2,
-                     label=f'Pendulum {idx + 1}')
+            plot_parametric(ax3, theta1, theta2, self.downsample_method, color=color, alpha=0.7, linewidth=2,
+                            label=f'Pendulum {idx + 1}')
             ax3.scatter(theta1[0], theta2[0], color=color, s=30, marker='o',
                         edgecolors='black', zorder=5)
 
@@ -308,13 +311,8 @@ class MultiRK4Visualizer:
         for idx, pendulum in enumerate(self.pendulums):
             color = self.colors[idx % len(self.colors)]
 
-            theta1 = pendulum.solution_y[0]
-            theta2 = pendulum.solution_y[1]
-
-            x1 = pendulum.length_1 * np.sin(theta1)
-            y1 = -pendulum.length_1 * np.cos(theta1)
-            x2 = x1 + pendulum.length_2 * np.sin(theta2)
-            y2 = y1 - pendulum.length_2 * np.cos(theta2)
+            traj = pendulum.trajectory
+            x1, y1, x2, y2 = traj.x1, traj.y1, traj.x2, traj.y2
 
             line, = ax.plot([], [], '-', lw=2, color=color, alpha=0.8)
 
@@ -370,11 +368,11 @@ class MultiRK4Visualizer:
         return self.animate_multiple()
 
 
-def analyze_single_rk4_pendulum(pendulum):
-    viz = RK4Visualisation(pendulum)
+def analyze_single_rk4_pendulum(pendulum, downsample_method='minmax'):
+    viz = RK4Visualisation(pendulum, downsample_method)
     return viz.create_complete_analysis()
 
 
-def analyze_multiple_rk4_pendulums(pendulums):
-    viz = MultiRK4Visualizer(pendulums)
+def analyze_multiple_rk4_pendulums(pendulums, downsample_method='minmax'):
+    viz = MultiRK4Visualizer(pendulums, downsample_method)
     return viz.create_complete_analysis()
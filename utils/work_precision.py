@@ -0,0 +1,131 @@
+import time
+import numpy as np
+import matplotlib.pyplot as plt
+from scipy.integrate import solve_ivp
+from utils.pendulum import Pendulum, accelerations
+from utils.trajectory import Trajectory
+
+
+# each method is swept over either its fixed step count or its tolerance;
+# new integrators only need an entry here
+METHODS = {
+    "rk4": ("steps", [250, 500, 1000, 2000, 4000, 8000, 16000]),
+    "DOP853": ("tol", [1e-4, 1e-6, 1e-8, 1e-10, 1e-12]),
+    "RK45": ("tol", [1e-4, 1e-6, 1e-8, 1e-10]),
+}
+
+
+class CountingPendulum(Pendulum):
+    def __init__(self, config):
+        self.nfev = 0
+        super().__init__(config)
+
+    def derivatives(self, t, y):
+        self.nfev += 1
+        return super().derivatives(t, y)
+
+
+def method_config(config, method, setting):
+    # every method is compared on its own full grid
+    cfg = dict(config, output_stride=1, output_times=None)
+    if method == "rk4":
+        cfg.update(method="rk4", steps=setting)
+    else:
+        cfg.update(method="solve_ivp", ivp_method=method, rtol=setting, atol=setting)
+    return cfg
+
+
+def reference_solution(config, tol=1e-13):
+    params = (config["mass_1"], config["mass_2"], config["length_1"], config["length_2"])
+
+    def derivatives(t, y):
+        return [y[2], y[3], *accelerations(*y, *params)]
+
+    y0 = np.radians([config["theta_1"], config["theta_2"],
+                     config["theta_1_dot"], config["theta_2_dot"]])
+    return solve_ivp(derivatives, config["t_span"], y0, method="DOP853",
+                     rtol=tol, atol=tol, dense_output=True)
+
+
+def run_method(config, method, setting, repeats=1):
+    cfg = method_config(config, method, setting)
+    wall = np.inf
+    for _ in range(repeats):
+        start = time.perf_counter()
+        p = CountingPendulum(cfg)
+        wall = min(wall, time.perf_counter() - start)
+
+    if p.method == "solve_ivp":
+        t, y = p.solution.t, p.solution.y
+    else:
+        t, y = p.solution_t, p.solution_y
+    return t, y, wall, p.nfev
+
+
+def work_precision(config, methods=None, short_time=1.0, repeats=1):
+    reference = reference_solution(config)
+    t0 = config["t_span"][0]
+    params = (config["length_1"], config["length_2"], config["mass_1"], config["mass_2"])
+    E0 = Trajectory(t0, reference.y[:, 0], *params).energy
+    scale = abs(E0) if E0 != 0 else 1.0
+
+    rows = []
+    for method, (kind, settings) in (methods or METHODS).items():
+        for setting in settings:
+            t, y, wall, nfev = run_method(config, method, setting, repeats)
+            short = t <= t0 + short_time
+            state_error = np.abs(y[:, short] - reference.sol(t[short])).max()
+            energy_error = np.abs(Trajectory(t, y, *params).energy - E0).max() / scale
+            rows.append({
+                "method": method,
+                "kind": kind,
+                "setting": setting,
+                "wall": wall,
+                "nfev": nfev,
+                "state_error": state_error,
+                "energy_error": energy_error,
+            })
+    return rows
+
+
+def print_table(rows):
+    print(f"{'method':<8} {'setting':>10} {'wall [s]':>10} {'RHS evals':>10} "
+          f"{'state err':>11} {'energy err':>11}")
+    for r in rows:
+        setting = f"{r['setting']:.0e}" if r["kind"] == "tol" else str(r["setting"])
+        print(f"{r['method']:<8} {setting:>10} {r['wall']:>10.4f} {r['nfev']:>10d} "
+              f"{r['state_error']:>11.3e} {r['energy_error']:>11.3e}")
+
+
+def plot_work_precision(rows):
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 5))
+
+    for method in dict.fromkeys(r["method"] for r in rows):
+        subset = [r for r in rows if r["method"] == method]
+        ax1.loglog([r["nfev"] for r in subset], [r["state_error"] for r in subset],
+                   'o-', label=method)
+        ax2.loglog([r["wall"] for r in subset], [r["energy_error"] for r in subset],
+                   'o-', label=method)
+
+    ax1.set_xlabel('RHS evaluations')
+    ax1.set_ylabel('Max state error (short time)')
+    ax1.set_title('Work-Precision: State Error')
+    ax1.grid(True, which='both', alpha=0.3)
+    ax1.legend()
+
+    ax2.set_xlabel('Wall time (s)')
+    ax2.set_ylabel('Max relative energy error')
+    ax2.set_title('Work-Precision: Energy Error')
+    ax2.grid(True, which='both', alpha=0.3)
+    ax2.legend()
+
+    plt.tight_layout()
+    plt.show()
+    return fig
+
+
+if __name__ == "__main__":
+    from config import config
+    rows = work_precision(config)
+    print_table(rows)
+    plot_work_precision(rows)